@@ -0,0 +1,59 @@
+"""
+Shared, memoized loader for Grok aliases from the custom models config.
+
+The alias patch modules all need the Grok aliases defined in the file at
+CUSTOM_MODELS_CONFIG_PATH. Parsing it once per process (and again only when
+the file changes on disk) keeps repeated tool calls from re-reading the file.
+"""
+
+import functools
+import json
+import os
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _iter_models(f):
+    """Yield the entries of the top-level "models" array of an open config file.
+
+    With ijson available the array is streamed, so only one model entry is
+    materialized at a time; otherwise the whole document is parsed.
+    """
+    if ijson is not None:
+        yield from ijson.items(f, 'models.item')
+    else:
+        yield from json.loads(f.read()).get('models', [])
+
+
+@functools.lru_cache(maxsize=8)
+def load_grok_aliases(path: str, mtime: float) -> tuple[str, ...]:
+    """Parse the config at `path` and return the aliases of all Grok models.
+
+    `mtime` is only part of the cache key so that edits to the file are picked up.
+    """
+    with open(path, 'rb') as f:
+        return tuple(
+            alias
+            for model in _iter_models(f)
+            if 'grok' in model.get('model_name', '').lower()
+            for alias in model.get('aliases', [])
+        )
+
+
+def get_cached_aliases(path=None) -> tuple[str, ...]:
+    """Return the Grok aliases from the config file, or an empty tuple if it is missing.
+
+    Defaults to the CUSTOM_MODELS_CONFIG_PATH environment variable. Parse errors
+    propagate to the caller.
+    """
+    config_path = path or os.getenv('CUSTOM_MODELS_CONFIG_PATH')
+    if not config_path:
+        return ()
+    try:
+        mtime = os.stat(config_path).st_mtime
+    except OSError:
+        return ()
+    return load_grok_aliases(config_path, mtime)
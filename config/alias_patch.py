@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Single composed patch for BaseTool._get_available_models.
+
+Both the debug patch and the direct alias injection need to hook
+_get_available_models. Instead of stacking one monkey-patch on top of the
+other, each of them calls install(), which wraps the original method once
+and runs every enabled step in a single pass per tool call.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Steps switched on via install(); read by the wrapper on every call
+_steps = {
+    'debug': None,
+    'inject': None,
+}
+
+def install(debug=False, inject=True):
+    """
+    Wrap BaseTool._get_available_models, enabling the requested steps.
+
+    Repeated calls only switch on additional steps; the method is never
+    wrapped twice.
+
+    Args:
+        debug: Log registry and result diagnostics around the original call
+        inject: Merge Grok aliases and x-ai models into the returned list
+
+    Returns:
+        True if the wrapper is in place
+    """
+
+    if debug and _steps['debug'] is None:
+        import debug_alias_patch
+        _steps['debug'] = debug_alias_patch
+    if inject and _steps['inject'] is None:
+        from direct_alias_injection import add_grok_models
+        _steps['inject'] = add_grok_models
+
+    try:
+        from tools.shared.base_tool import BaseTool
+    except ImportError as e:
+        logger.error(f"❌ Failed to import BaseTool for patching: {e}")
+        return False
+
+    if getattr(BaseTool._get_available_models, '_alias_patch', False):
+        logger.info(f"Alias patch already installed, steps now: debug={_steps['debug'] is not None}, inject={_steps['inject'] is not None}")
+        return True
+
+    # Store original method
+    original_get_available_models = BaseTool._get_available_models
+
+    def combined_get_available_models(self):
+        """_get_available_models with the enabled debug and injection steps applied."""
+
+        add_grok_models = _steps['inject']
+        debug = _steps['debug'] if logger.isEnabledFor(logging.INFO) else None
+        if debug is not None:
+            debug.log_registry_aliases(self)
+
+        try:
+            models = original_get_available_models(self)
+        except Exception as e:
+            if debug is not None:
+                debug.log_failure(e)
+            if add_grok_models is None:
+                raise
+            logger.error(f"Original _get_available_models failed: {e}")
+            # Fallback to basic model list
+            from providers.registry import ModelProviderRegistry
+            models = ModelProviderRegistry.get_available_model_names()
+        else:
+            # Log what the original returned, before injection hides missing aliases
+            if debug is not None:
+                debug.log_available_models(models)
+
+        if add_grok_models is not None:
+            models = add_grok_models(models)
+
+        return models
+
+    combined_get_available_models._alias_patch = True
+    BaseTool._get_available_models = combined_get_available_models
+    logger.info(f"✅ Alias patch applied to BaseTool._get_available_models (debug={_steps['debug'] is not None}, inject={_steps['inject'] is not None})")
+    return True
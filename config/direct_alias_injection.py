@@ -12,6 +12,12 @@ import os
 import sys
 import logging
 
+import alias_patch
+from _alias_cache import get_cached_aliases
+
+GROK_ALIASES_ENABLED = os.environ.get("GROK_ALIASES_ENABLED") == "true"
+CUSTOM_MODELS_CONFIG_PATH = os.environ.get("CUSTOM_MODELS_CONFIG_PATH")
+
 # Set up logging - CRITICAL: Output to stderr to avoid JSON-RPC interference
 logging.basicConfig(level=logging.INFO, stream=sys.stderr, 
                    format='[ALIAS_INJECT] %(levelname)s: %(message)s')
@@ -21,25 +27,13 @@ def get_direct_aliases():
     """Get Grok aliases directly from environment variables with multiple fallback strategies."""
     
     # Strategy 1: Try to load from custom config file first
-    config_path = os.getenv('CUSTOM_MODELS_CONFIG_PATH')
-    if config_path and os.path.exists(config_path):
-        try:
-            import json
-            with open(config_path, 'r') as f:
-                config_data = json.load(f)
-            
-            grok_aliases = []
-            if 'models' in config_data:
-                for model in config_data['models']:
-                    if 'grok' in model.get('model_name', '').lower():
-                        aliases = model.get('aliases', [])
-                        grok_aliases.extend(aliases)
-            
-            if grok_aliases:
-                logger.info(f"Loaded {len(grok_aliases)} Grok aliases from config file: {grok_aliases}")
-                return grok_aliases
-        except Exception as e:
-            logger.warning(f"Failed to load aliases from config file: {e}, falling back to environment/defaults")
+    try:
+        grok_aliases = get_cached_aliases(CUSTOM_MODELS_CONFIG_PATH)
+        if grok_aliases:
+            logger.info(f"Loaded {len(grok_aliases)} Grok aliases from config file: {grok_aliases}")
+            return grok_aliases
+    except Exception as e:
+        logger.warning(f"Failed to load aliases from config file: {e}, falling back to environment/defaults")
     
     # Strategy 2: Check if custom aliases are defined in environment
     custom_aliases = os.getenv('GROK_ALIASES')
@@ -62,89 +56,90 @@ def get_direct_aliases():
     ]
     
     # Check if Grok aliases are enabled
-    if os.getenv('GROK_ALIASES_ENABLED') == 'true':
+    if GROK_ALIASES_ENABLED:
         logger.info(f"Using default Grok aliases as fallback: {default_grok_aliases}")
         return default_grok_aliases
     
     logger.info("Grok aliases not enabled, returning empty list")
     return []
 
-def inject_grok_aliases_into_models_list(models_list):
+def inject_grok_aliases_into_models_list(models_list, seen=None):
     """
     Inject Grok aliases directly into a models list.
     
     Args:
         models_list: List of model names to extend
+        seen: Optional set mirroring models_list; kept in sync with any additions
         
     Returns:
         Extended list with Grok aliases added
     """
     
+    if not GROK_ALIASES_ENABLED:
+        return models_list
+    
     grok_aliases = get_direct_aliases()
     if not grok_aliases:
         return models_list
     
+    if seen is None:
+        seen = set(models_list)
+    if seen.issuperset(grok_aliases):
+        return models_list
+    
     # Add aliases that aren't already in the list
     added_aliases = []
     for alias in grok_aliases:
-        if alias not in models_list:
+        if alias not in seen:
             models_list.append(alias)
+            seen.add(alias)
             added_aliases.append(alias)
     
-    if added_aliases:
-        logger.info(f"Direct injection added {len(added_aliases)} Grok aliases: {added_aliases}")
-    else:
-        logger.info("No new Grok aliases needed to be added")
+    logger.info("Direct injection added %d Grok aliases: %s", len(added_aliases), added_aliases)
     
     return models_list
 
+def add_grok_models(models):
+    """
+    Add Grok aliases and the x-ai Grok models to a models list in one pass.
+    
+    Args:
+        models: List of model names returned by BaseTool._get_available_models
+        
+    Returns:
+        The same list, extended in place
+    """
+    
+    # Inject Grok aliases directly
+    seen = set(models)
+    models = inject_grok_aliases_into_models_list(models, seen)
+    
+    # Ensure x-ai models are included (they should be from OpenRouter)
+    xai_models = ['x-ai/grok-4', 'x-ai/grok-3', 'x-ai/grok-3-fast']
+    for model in xai_models:
+        if model not in seen:
+            models.append(model)
+            seen.add(model)
+            logger.info("Added missing X.AI model: %s", model)
+    
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Final models list contains %d models", len(models))
+        grok_models = [m for m in models if 'grok' in m.lower()]
+        logger.info("Final Grok models: %s", grok_models)
+    
+    return models
+
 def patch_base_tool_get_available_models():
     """
     Patch the BaseTool._get_available_models method to inject Grok aliases directly.
     
     This provides a failsafe mechanism when the OpenRouter registry fails to load.
+    The hook is shared with the debug patch so the method is only wrapped once.
     """
     
     try:
-        from tools.shared.base_tool import BaseTool
-        
-        # Store original method
-        original_get_available_models = BaseTool._get_available_models
-        
-        def patched_get_available_models(self):
-            """Enhanced _get_available_models with direct Grok alias injection."""
-            
-            # Call original method first
-            try:
-                models = original_get_available_models(self)
-            except Exception as e:
-                logger.error(f"Original _get_available_models failed: {e}")
-                # Fallback to basic model list
-                from providers.registry import ModelProviderRegistry
-                models = ModelProviderRegistry.get_available_model_names()
-            
-            # Inject Grok aliases directly
-            models = inject_grok_aliases_into_models_list(models)
-            
-            # Ensure x-ai models are included (they should be from OpenRouter)
-            xai_models = ['x-ai/grok-4', 'x-ai/grok-3', 'x-ai/grok-3-fast']
-            for model in xai_models:
-                if model not in models:
-                    models.append(model)
-                    logger.info(f"Added missing X.AI model: {model}")
-            
-            logger.info(f"Final models list contains {len(models)} models")
-            grok_models = [m for m in models if 'grok' in m.lower()]
-            logger.info(f"Final Grok models: {grok_models}")
-            
-            return models
-        
-        # Apply patch
-        BaseTool._get_available_models = patched_get_available_models
-        logger.info("✅ Direct alias injection patch applied to BaseTool._get_available_models")
-        
-    except ImportError as e:
-        logger.error(f"❌ Failed to import BaseTool for patching: {e}")
+        if alias_patch.install(inject=True):
+            logger.info("✅ Direct alias injection patch applied to BaseTool._get_available_models")
     except Exception as e:
         logger.error(f"❌ Failed to patch BaseTool._get_available_models: {e}")
 
@@ -169,7 +164,6 @@ def patch_tool_schemas():
             logger.info("ChatTool not found or not importable")
         
         # Try to find and patch any tool schema definitions
-        import sys
         for module_name in list(sys.modules.keys()):
             if 'tools' in module_name.lower() and sys.modules[module_name]:
                 module = sys.modules[module_name]
@@ -181,9 +175,11 @@ def patch_tool_schemas():
                             if isinstance(value, list) and any('x-ai/grok' in str(item) for item in value if isinstance(item, str)):
                                 logger.info(f"Found potential model enum in {module_name}.{attr_name}.{key}")
                                 # Inject our aliases
+                                present = set(value)
                                 for alias in grok_aliases:
-                                    if alias not in value:
+                                    if alias not in present:
                                         value.append(alias)
+                                        present.add(alias)
                                         logger.info(f"Injected {alias} into {module_name}.{attr_name}.{key}")
         
         logger.info("Tool schema patching completed")
@@ -194,7 +190,7 @@ def patch_tool_schemas():
 def apply_direct_alias_injection():
     """Apply direct alias injection if enabled."""
     
-    if os.getenv('GROK_ALIASES_ENABLED') == 'true':
+    if GROK_ALIASES_ENABLED:
         logger.info("=== DIRECT ALIAS INJECTION ENABLED ===")
         patch_base_tool_get_available_models()
         patch_tool_schemas()
@@ -203,5 +199,5 @@ def apply_direct_alias_injection():
         logger.info("Direct alias injection disabled")
 
 # Auto-apply when this module is imported
-if __name__ == "__main__" or os.getenv("GROK_ALIASES_ENABLED") == "true":
+if __name__ == "__main__" or GROK_ALIASES_ENABLED:
     apply_direct_alias_injection()
\ No newline at end of file
@@ -6,10 +6,20 @@ This patches Pydantic enum validation to accept Grok aliases
 by monkey-patching the validation functions.
 """
 
+import enum
+import functools
+import importlib
 import os
+import re
 import sys
 import logging
 
+from _alias_cache import get_cached_aliases
+
+GROK_ALIASES_ENABLED = os.environ.get("GROK_ALIASES_ENABLED") == "true"
+CUSTOM_MODELS_CONFIG_PATH = os.environ.get("CUSTOM_MODELS_CONFIG_PATH")
+GROK_ENUM_PATH = os.environ.get("GROK_ENUM_PATH")
+
 # Set up logging - CRITICAL: Output to stderr to avoid JSON-RPC interference  
 logging.basicConfig(level=logging.INFO, stream=sys.stderr,
                    format='[ENUM_PATCH] %(levelname)s: %(message)s')
@@ -19,25 +29,13 @@ def get_grok_aliases():
     """Get Grok aliases for enum patching."""
     
     # Load from config file first
-    config_path = os.getenv('CUSTOM_MODELS_CONFIG_PATH')
-    if config_path and os.path.exists(config_path):
-        try:
-            import json
-            with open(config_path, 'r') as f:
-                config_data = json.load(f)
-            
-            grok_aliases = []
-            if 'models' in config_data:
-                for model in config_data['models']:
-                    if 'grok' in model.get('model_name', '').lower():
-                        aliases = model.get('aliases', [])
-                        grok_aliases.extend(aliases)
-            
-            if grok_aliases:
-                logger.info(f"Loaded {len(grok_aliases)} Grok aliases from config: {grok_aliases}")
-                return grok_aliases
-        except Exception as e:
-            logger.warning(f"Failed to load from config: {e}")
+    try:
+        grok_aliases = get_cached_aliases(CUSTOM_MODELS_CONFIG_PATH)
+        if grok_aliases:
+            logger.info(f"Loaded {len(grok_aliases)} Grok aliases from config: {grok_aliases}")
+            return grok_aliases
+    except Exception as e:
+        logger.warning(f"Failed to load from config: {e}")
     
     # Fallback to environment variable
     custom_aliases = os.getenv('GROK_ALIASES')
@@ -47,35 +45,60 @@ def get_grok_aliases():
         return aliases
     
     # Final fallback to defaults
-    if os.getenv('GROK_ALIASES_ENABLED') == 'true':
+    if GROK_ALIASES_ENABLED:
         default_aliases = ['grok', 'grok-4', 'grok4', 'grok-3', 'grok3', 'grok-3-fast', 'grok3-fast', 'grokfast', 'grok-fast']
         logger.info(f"Using default Grok aliases: {default_aliases}")
         return default_aliases
     
     return []
 
-def create_grok_model_mapping():
-    """Create mapping from Grok aliases to full model names."""
-    aliases = get_grok_aliases()
+# Alternatives are tried in order at the start of the alias, mirroring the
+# precedence grok-4 > fast > grok-3; anything unmatched defaults to grok-4
+_GROK_CLASSIFIER = re.compile(r'^(?:(?P<grok4>grok$|.*grok-4)|(?P<fast>.*fast)|(?P<grok3>.*grok-3))')
+_GROK_TARGETS = {
+    'grok4': 'x-ai/grok-4',
+    'fast': 'x-ai/grok-3-fast',
+    'grok3': 'x-ai/grok-3',
+}
+
+@functools.lru_cache(maxsize=1)
+def _build_grok_model_mapping(aliases):
     mapping = {}
-    
     for alias in aliases:
-        if 'grok-4' in alias or alias == 'grok':
-            mapping[alias] = 'x-ai/grok-4'
-        elif 'grok-3-fast' in alias or 'fast' in alias:
-            mapping[alias] = 'x-ai/grok-3-fast'  
-        elif 'grok-3' in alias:
-            mapping[alias] = 'x-ai/grok-3'
-        else:
-            mapping[alias] = 'x-ai/grok-4'  # Default to grok-4
+        match = _GROK_CLASSIFIER.match(alias)
+        mapping[alias] = _GROK_TARGETS[match.lastgroup] if match else 'x-ai/grok-4'
     
-    logger.info(f"Created Grok alias mapping: {mapping}")
+    logger.info("Created Grok alias mapping: %s", mapping)
     return mapping
 
+def create_grok_model_mapping():
+    """Create mapping from Grok aliases to full model names."""
+    return _build_grok_model_mapping(tuple(get_grok_aliases()))
+
+def _iter_model_enums():
+    """Yield (module_name, attr_name, enum) for the enums that may list Grok models.
+    
+    GROK_ENUM_PATH=module:AttrName points straight at the enum; otherwise the
+    already-loaded tools modules are searched.
+    """
+    if GROK_ENUM_PATH:
+        module_name, _, attr_name = GROK_ENUM_PATH.partition(':')
+        module = importlib.import_module(module_name)
+        yield module_name, attr_name, getattr(module, attr_name)
+        return
+    
+    # Snapshot sys.modules, since patching may trigger further imports
+    for module_name, module in list(sys.modules.items()):
+        if module is None or 'tools' not in module_name.lower():
+            continue
+        for attr_name, attr in list(getattr(module, '__dict__', {}).items()):
+            if isinstance(attr, enum.EnumMeta):
+                yield module_name, attr_name, attr
+
 def patch_pydantic_validation():
     """Patch Pydantic enum validation to accept Grok aliases."""
     
-    if os.getenv('GROK_ALIASES_ENABLED') != 'true':
+    if not GROK_ALIASES_ENABLED:
         return
         
     try:
@@ -111,7 +134,7 @@ def patch_pydantic_validation():
                     if isinstance(value, str) and value in grok_mapping:
                         # Convert alias to full model name and try again
                         full_model_name = grok_mapping[value]
-                        logger.info(f"Converting Grok alias '{value}' to '{full_model_name}'")
+                        logger.info("Converting Grok alias '%s' to '%s'", value, full_model_name)
                         try:
                             if original_enum_validator:
                                 return original_enum_validator(full_model_name, enum_class, **kwargs)
@@ -141,31 +164,25 @@ def patch_pydantic_validation():
             
         # Alternative approach: patch specific enum classes if we can find them
         try:
-            # Look for model enum definitions in sys.modules
-            for module_name, module in sys.modules.items():
-                if module and 'tools' in module_name.lower():
-                    for attr_name in dir(module):
-                        attr = getattr(module, attr_name, None)
-                        if attr and hasattr(attr, '__members__') and hasattr(attr, '_value_'):
-                            # This looks like an enum
-                            try:
-                                # Check if it contains Grok models
-                                enum_values = [str(v.value) if hasattr(v, 'value') else str(v) for v in attr.__members__.values()]
-                                if any('x-ai/grok' in str(v) for v in enum_values):
-                                    logger.info(f"Found Grok model enum: {module_name}.{attr_name}")
-                                    # Try to add aliases to the enum
-                                    for alias, full_name in grok_mapping.items():
-                                        if full_name in enum_values and alias not in enum_values:
-                                            try:
-                                                # This is tricky with frozen enums, but we can try
-                                                setattr(attr, alias.upper().replace('-', '_'), getattr(attr, full_name.upper().replace('-', '_').replace('/', '_').replace('.', '_')))
-                                                logger.info(f"Added alias {alias} to enum {attr_name}")
-                                            except Exception as e:
-                                                logger.info(f"Could not add alias {alias} to enum: {e}")
-                            except Exception as e:
-                                logger.info(f"Error processing enum {attr_name}: {e}")
+            for module_name, attr_name, attr in _iter_model_enums():
+                try:
+                    # Check if it contains Grok models
+                    enum_values = [str(v.value) if hasattr(v, 'value') else str(v) for v in attr.__members__.values()]
+                    if any('x-ai/grok' in str(v) for v in enum_values):
+                        logger.info("Found Grok model enum: %s.%s", module_name, attr_name)
+                        # Try to add aliases to the enum
+                        for alias, full_name in grok_mapping.items():
+                            if full_name in enum_values and alias not in enum_values:
+                                try:
+                                    # This is tricky with frozen enums, but we can try
+                                    setattr(attr, alias.upper().replace('-', '_'), getattr(attr, full_name.upper().replace('-', '_').replace('/', '_').replace('.', '_')))
+                                    logger.info("Added alias %s to enum %s", alias, attr_name)
+                                except Exception as e:
+                                    logger.info("Could not add alias %s to enum: %s", alias, e)
+                except Exception as e:
+                    logger.info("Error processing enum %s: %s", attr_name, e)
         except Exception as e:
-            logger.error(f"Error in enum patching: {e}")
+            logger.error("Error in enum patching: %s", e)
             
         logger.info("Enum patching completed")
         
@@ -174,7 +191,7 @@ def patch_pydantic_validation():
 
 def apply_enum_patches():
     """Apply all enum patches."""
-    if os.getenv('GROK_ALIASES_ENABLED') == 'true':
+    if GROK_ALIASES_ENABLED:
         logger.info("=== ENUM PATCHING ENABLED ===")
         patch_pydantic_validation() 
         logger.info("=== ENUM PATCHING COMPLETE ===")
@@ -182,5 +199,5 @@ def apply_enum_patches():
         logger.info("Enum patching disabled")
 
 # Auto-apply when this module is imported
-if __name__ == "__main__" or os.getenv("GROK_ALIASES_ENABLED") == "true":
+if __name__ == "__main__" or GROK_ALIASES_ENABLED:
     apply_enum_patches()
\ No newline at end of file
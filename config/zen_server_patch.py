@@ -2,8 +2,8 @@
 """
 Zen server initialization patch.
 
-This patch is applied at the start of server.py to enable debug logging
-for the Grok alias loading issue. It imports and applies the debug patch
+This patch is applied at the start of server.py to enable the Grok alias
+patches. With GROK_ALIAS_DEBUG=1 it also imports and applies the debug patch
 before any other imports.
 """
 
@@ -11,6 +11,9 @@ import os
 import sys
 import logging
 
+GROK_ALIASES_ENABLED = os.environ.get("GROK_ALIASES_ENABLED") == "true"
+GROK_ALIAS_DEBUG = os.environ.get("GROK_ALIAS_DEBUG") == "1"
+
 # CRITICAL: Configure logging to stderr to avoid JSON-RPC interference
 logging.basicConfig(level=logging.INFO, stream=sys.stderr, 
                    format='[ZEN_PATCH] %(levelname)s: %(message)s')
@@ -19,7 +22,7 @@ logger = logging.getLogger(__name__)
 def apply_zen_server_patch():
     """Apply debug and alias injection patches if GROK_ALIASES_ENABLED is true."""
     
-    if os.getenv("GROK_ALIASES_ENABLED") == "true":
+    if GROK_ALIASES_ENABLED:
         logger.info("Grok aliases debugging enabled")
         
         # Ensure patches are importable
@@ -27,12 +30,13 @@ def apply_zen_server_patch():
         if current_dir not in sys.path:
             sys.path.insert(0, current_dir)
         
-        try:
-            # Import and apply debug patch
-            import debug_alias_patch
-            logger.info("Debug patch applied successfully")
-        except Exception as e:
-            logger.error(f"Failed to apply debug patch: {e}")
+        if GROK_ALIAS_DEBUG:
+            try:
+                # Import and apply debug patch
+                import debug_alias_patch
+                logger.info("Debug patch applied successfully")
+            except Exception as e:
+                logger.error(f"Failed to apply debug patch: {e}")
         
         try:
             # Import and apply direct alias injection
@@ -1,53 +1,148 @@
 #!/usr/bin/env python3
 """Pre-deployment configuration verification script."""
 
-import sys, os, json
-from pathlib import Path
+import sys, os, json, re, stat
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# ijson reports malformed input with its own exception type
+JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError) if ijson is not None else (json.JSONDecodeError,)
 
 # CRITICAL: All output must go to stderr to avoid JSON-RPC interference
+# Lines are collected and written in batches by flush_log()
+_log_lines = []
+
 def log(msg):
-    print(f"[CONFIG_VERIFY] {msg}", file=sys.stderr)
+    _log_lines.append(f"[CONFIG_VERIFY] {msg}\n")
+
+def log_lines(msgs):
+    _log_lines.extend(f"[CONFIG_VERIFY] {msg}\n" for msg in msgs)
+
+def flush_log():
+    if _log_lines:
+        sys.stderr.write(''.join(_log_lines))
+        sys.stderr.flush()
+        _log_lines.clear()
+
+def encode_json(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def write_grok_summary(output_path, grok_models):
+    """Append the Grok aliases as the grok_summary step output, so later steps need not re-parse the config."""
+    summary = {'grok_models': [{'name': name, 'aliases': m.get('aliases', [])} for name, m in grok_models]}
+    with open(output_path, 'ab') as f:
+        f.write(b'grok_summary=' + encode_json(summary) + b'\n')
+
+# Case-insensitive search instead of lowercasing every model name
+GROK_RE = re.compile('grok', re.IGNORECASE)
 
-log("Starting pre-deployment configuration verification")
+def grok_entries(models):
+    """Return (model_name, model) pairs for the Grok models, reading each name once."""
+    return [(name, m) for m in models if GROK_RE.search(name := m.get('model_name', ''))]
 
-config_path = os.getenv('CUSTOM_MODELS_CONFIG_PATH')
-log(f'CUSTOM_MODELS_CONFIG_PATH: {config_path}')
-log(f'GROK_ALIASES_ENABLED: {os.getenv("GROK_ALIASES_ENABLED")}')
+def read_config_bytes(config_path, size):
+    """Read the whole config with one read call, hinting sequential readahead."""
+    fd = os.open(config_path, os.O_RDONLY)
+    try:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
 
-if config_path:
-    config_file = Path(config_path)
-    log(f'Config file exists: {config_file.exists()}')
-    if config_file.exists():
-        log(f'Config file is readable: {config_file.is_file()}')
-        log(f'Config file size: {config_file.stat().st_size} bytes')
+def load_grok_models(config_path, size):
+    """Parse the config and return (has models section, Grok (name, model) pairs).
+
+    With ijson available the models array is streamed and only Grok entries
+    are kept, so the other models are never held in memory at once.
+    """
+    if ijson is not None:
+        seen_models = []
+
+        def events(f):
+            for prefix, event, value in ijson.parse(f):
+                if prefix == 'models' and event == 'start_array':
+                    seen_models.append(True)
+                yield prefix, event, value
+
+        with open(config_path, 'rb') as f:
+            grok_models = grok_entries(ijson.items(events(f), 'models.item'))
+        return bool(seen_models), grok_models
+
+    # Parse the raw bytes; orjson (when installed) skips the text decode step
+    raw = read_config_bytes(config_path, size)
+    config_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if 'models' not in config_data:
+        return False, []
+    return True, grok_entries(config_data['models'])
+
+def main():
+    log("Starting pre-deployment configuration verification")
+
+    config_path = os.getenv('CUSTOM_MODELS_CONFIG_PATH')
+    grok_aliases_enabled = os.getenv('GROK_ALIASES_ENABLED')
+    github_output = os.getenv('GITHUB_OUTPUT')
+    log(f'CUSTOM_MODELS_CONFIG_PATH: {config_path}')
+    log(f'GROK_ALIASES_ENABLED: {grok_aliases_enabled}')
+
+    if config_path:
+        # One stat call answers exists, is-a-file and size
         try:
-            with open(config_file, 'r') as f:
-                config_data = json.load(f)
-            log('✅ Config file JSON is valid')
-            if 'models' in config_data:
-                grok_models = [m for m in config_data['models'] if 'grok' in m.get('model_name', '').lower()]
-                log(f'Found {len(grok_models)} Grok models in config')
-                for model in grok_models:
-                    model_name = model.get('model_name', 'unknown')
-                    aliases = model.get('aliases', [])
-                    log(f'  {model_name}: aliases = {aliases}')
-                if grok_models:
-                    log('✅ Grok models found in config')
+            config_stat = os.stat(config_path)
+        except OSError:
+            config_stat = None
+        log(f'Config file exists: {config_stat is not None}')
+        if config_stat is not None:
+            log(f'Config file is readable: {stat.S_ISREG(config_stat.st_mode)}')
+            log(f'Config file size: {config_stat.st_size} bytes')
+            # Emit the context so far in case the parse hangs and the step is killed
+            flush_log()
+            try:
+                has_models, grok_models = load_grok_models(config_path, config_stat.st_size)
+                log('✅ Config file JSON is valid')
+                if has_models:
+                    log(f'Found {len(grok_models)} Grok models in config')
+                    log_lines(f"  {name}: aliases = {m.get('aliases', [])}" for name, m in grok_models)
+                    if grok_models:
+                        log('✅ Grok models found in config')
+                    else:
+                        log('❌ No Grok models found in config')
                 else:
-                    log('❌ No Grok models found in config')
-            else:
-                log('❌ No models section found in config')
-        except json.JSONDecodeError as e:
-            log(f'❌ Config file JSON is invalid: {e}')
-            sys.exit(1)
-        except Exception as e:
-            log(f'❌ Failed to read config file: {e}')
+                    log('❌ No models section found in config')
+                if github_output:
+                    write_grok_summary(github_output, grok_models)
+            except JSON_ERRORS as e:
+                log(f'❌ Config file JSON is invalid: {e}')
+                sys.exit(1)
+            except (TypeError, AttributeError, ValueError) as e:
+                # Valid JSON but not shaped like a models config, e.g. a null model_name
+                log(f'❌ Config file structure is invalid: {e}')
+                sys.exit(1)
+            except OSError as e:
+                # e.g. unreadable despite the stat above succeeding
+                log(f'❌ Failed to read config file: {e}')
+                sys.exit(1)
+        else:
+            log('❌ Config file does not exist or is not accessible')
             sys.exit(1)
     else:
-        log('❌ Config file does not exist or is not accessible')
+        log('❌ CUSTOM_MODELS_CONFIG_PATH not set')
         sys.exit(1)
-else:
-    log('❌ CUSTOM_MODELS_CONFIG_PATH not set')
-    sys.exit(1)
 
-log('✅ Pre-deployment config verification passed')
+    log('✅ Pre-deployment config verification passed')
+
+try:
+    main()
+finally:
+    # Flush before any traceback is printed, so the context lines come first
+    flush_log()
@@ -18,49 +18,71 @@ const SERVER_VERSION = '1.0.0';
 // Session storage (in production, use Redis or database)
 const sessions = new Map();
 
+// Record which submodule servers a session has sent work to, so its streams
+// only receive notifications from those servers
+const subscribeSession = (sessionId, serverName) => {
+  const session = sessionId && sessions.get(sessionId);
+  if (session && serverName) {
+    session.servers.add(serverName);
+  }
+};
+
 // Initialize submodule manager
 const submoduleManager = new SubmoduleManager();
 
-app.use(express.json({ limit: '10mb' }));
+// CORS headers are the same for every response, so build them once
+const CORS_HEADERS = Object.entries({
+  'Access-Control-Allow-Origin': '*',
+  'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+  'Access-Control-Allow-Headers': 'Content-Type, Authorization, Mcp-Session-Id, MCP-Protocol-Version, Last-Event-ID'
+});
 
-// CORS middleware
+// CORS middleware - runs before body parsing so preflights return straight away
 app.use((req, res, next) => {
-  res.header('Access-Control-Allow-Origin', '*');
-  res.header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS');
-  res.header('Access-Control-Allow-Headers', 'Content-Type, Authorization, Mcp-Session-Id, MCP-Protocol-Version, Last-Event-ID');
+  for (const [name, value] of CORS_HEADERS) {
+    res.setHeader(name, value);
+  }
   if (req.method === 'OPTIONS') {
     return res.sendStatus(200);
   }
   next();
 });
 
+app.use(express.json({ limit: '10mb' }));
+
 // Store recent requests for debugging
 const recentRequests = [];
 const MAX_REQUESTS = 10;
 
-// Function to update activity time and reset timer
+// Function to update activity time and arm the inactivity timer
 const updateActivityTime = () => {
   lastActivityTime = Date.now();
   
-  // Clear existing timer
-  if (inactivityTimer) {
-    clearTimeout(inactivityTimer);
+  // A single timer is armed once; requests only move lastActivityTime forward
+  if (!inactivityTimer) {
+    inactivityTimer = setTimeout(checkInactivity, INACTIVITY_TIMEOUT_MS);
+  }
+};
+
+const checkInactivity = () => {
+  // Activity since the timer was armed: sleep until the new deadline instead
+  const remaining = INACTIVITY_TIMEOUT_MS - (Date.now() - lastActivityTime);
+  if (remaining > 0) {
+    inactivityTimer = setTimeout(checkInactivity, remaining);
+    return;
   }
   
-  // Set new timer for 15 minutes
-  inactivityTimer = setTimeout(() => {
-    console.log(`No client activity for ${INACTIVITY_TIMEOUT_MS / 1000} seconds. Shutting down...`);
-    console.log('Last activity was at:', new Date(lastActivityTime).toISOString());
-    
-    // Graceful shutdown
-    submoduleManager.shutdown().then(() => {
-      console.log('Submodule manager shut down successfully');
-      process.exit(0);
-    }).catch((error) => {
-      console.error('Error during shutdown:', error);
-      process.exit(1);
-    });
-  }, INACTIVITY_TIMEOUT_MS);
+  console.log(`No client activity for ${INACTIVITY_TIMEOUT_MS / 1000} seconds. Shutting down...`);
+  console.log('Last activity was at:', new Date(lastActivityTime).toISOString());
+  
+  // Graceful shutdown
+  submoduleManager.shutdown().then(() => {
+    console.log('Submodule manager shut down successfully');
+    process.exit(0);
+  }).catch((error) => {
+    console.error('Error during shutdown:', error);
+    process.exit(1);
+  });
 };
 
 // Health check
@@ -205,6 +227,20 @@ class MCPServer {
 
 const mcpServer = new MCPServer();
 
+// Fixed JSON-RPC error responses, serialized once instead of on every rejection
+const jsonRpcErrorBody = (code, message) => JSON.stringify({ jsonrpc: '2.0', error: { code, message } });
+const ERROR_BODIES = {
+  forbiddenOrigin: jsonRpcErrorBody(-32603, 'Forbidden: Invalid origin'),
+  sessionNotFound: jsonRpcErrorBody(-32603, 'Session not found'),
+  sessionIdRequired: jsonRpcErrorBody(-32603, 'Mcp-Session-Id header required'),
+  streamRequired: jsonRpcErrorBody(-32603, 'Method not allowed - GET endpoint requires Accept: text/event-stream')
+};
+
+const sendErrorBody = (res, status, body) => res.status(status).type('application/json').send(body);
+
+// Allow localhost connections for development
+const ALLOWED_ORIGINS = ['http://localhost', 'https://localhost', 'http://127.0.0.1', 'https://127.0.0.1'];
+
 // Origin validation for DNS rebinding protection
 const validateOrigin = (req, res, next) => {
   // Update activity time for all non-health-check requests
@@ -237,19 +273,11 @@ const validateOrigin = (req, res, next) => {
   const origin = req.get('Origin');
   const host = req.get('Host');
 
-  // Allow localhost connections for development
-  const allowedOrigins = ['http://localhost', 'https://localhost', 'http://127.0.0.1', 'https://127.0.0.1'];
   const isLocalhost = host && (host.startsWith('localhost:') || host.startsWith('127.0.0.1:'));
 
-  if (origin && !allowedOrigins.some(allowed => origin.startsWith(allowed)) && !isLocalhost) {
+  if (origin && !ALLOWED_ORIGINS.some(allowed => origin.startsWith(allowed)) && !isLocalhost) {
     console.warn('Blocked request from potentially malicious origin:', origin);
-    return res.status(403).json({
-      jsonrpc: '2.0',
-      error: {
-        code: -32603,
-        message: 'Forbidden: Invalid origin'
-      }
-    });
+    return sendErrorBody(res, 403, ERROR_BODIES.forbiddenOrigin);
   }
   next();
 };
@@ -270,13 +298,7 @@ const validateSession = (req, res, next) => {
   const isInitialize = req.body && req.body.method === 'initialize';
 
   if (!isInitialize && sessionId && !sessions.has(sessionId)) {
-    return res.status(404).json({
-      jsonrpc: '2.0',
-      error: {
-        code: -32603,
-        message: 'Session not found'
-      }
-    });
+    return sendErrorBody(res, 404, ERROR_BODIES.sessionNotFound);
   }
   next();
 };
@@ -303,13 +325,7 @@ const handleMCPGet = async (req, res) => {
   // Check if client wants SSE stream
   if (!accept.includes('text/event-stream')) {
     // Client doesn't accept SSE, return 405 per spec
-    return res.status(405).json({
-      jsonrpc: '2.0',
-      error: {
-        code: -32603,
-        message: 'Method not allowed - GET endpoint requires Accept: text/event-stream'
-      }
-    });
+    return sendErrorBody(res, 405, ERROR_BODIES.streamRequired);
   }
 
   // If no session ID provided, create a new session for streaming
@@ -318,21 +334,20 @@ const handleMCPGet = async (req, res) => {
     activeSessionId = uuidv4();
     sessions.set(activeSessionId, {
       created: new Date(),
-      protocolVersion: req.get('MCP-Protocol-Version') || MCP_PROTOCOL_VERSION
+      protocolVersion: req.get('MCP-Protocol-Version') || MCP_PROTOCOL_VERSION,
+      servers: new Set()
     });
     console.log(`Created new streaming session: ${activeSessionId}`);
   }
 
   // Set up HTTP streaming with chunked transfer encoding (HTTP Streamable, NOT SSE!)
+  // CORS headers were already set by the CORS middleware and are merged in here
   res.writeHead(200, {
     'Content-Type': 'application/json',
     'Cache-Control': 'no-cache',
     'Connection': 'keep-alive',
     'Transfer-Encoding': 'chunked',
-    'Mcp-Session-Id': activeSessionId,
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, Authorization, Mcp-Session-Id, MCP-Protocol-Version, Last-Event-ID'
+    'Mcp-Session-Id': activeSessionId
   });
 
   // Send initial connection confirmation
@@ -349,29 +364,45 @@ const handleMCPGet = async (req, res) => {
   res.write(JSON.stringify(connectionMessage) + '\n');
 
   // Keep connection alive with periodic heartbeat
+  // The frame never changes for this session, so serialize it once up front
+  const heartbeatFrame = JSON.stringify({
+    jsonrpc: '2.0',
+    method: 'notifications/message',
+    params: {
+      level: 'debug',
+      logger: SERVER_NAME,
+      data: `Heartbeat - Session: ${activeSessionId}`
+    }
+  }) + '\n';
   const heartbeatInterval = setInterval(() => {
     if (!res.destroyed) {
-      const heartbeat = {
-        jsonrpc: '2.0',
-        method: 'notifications/message',
-        params: {
-          level: 'debug',
-          logger: SERVER_NAME,
-          data: `Heartbeat - Session: ${activeSessionId}`
-        }
-      };
-      res.write(JSON.stringify(heartbeat) + '\n');
+      res.write(heartbeatFrame);
     }
   }, 30000); // 30 second heartbeat
 
+  // Stream notifications from the submodule servers this session has sent work to
+  // (log messages, progress); tool list changes alter every client's aggregated
+  // tool list, so those go to all streams
+  const forwardNotification = (serverName, message) => {
+    const session = sessions.get(activeSessionId);
+    const subscribed = message.method === 'notifications/tools/list_changed' ||
+      (session && session.servers.has(serverName));
+    if (subscribed && !res.destroyed) {
+      res.write(JSON.stringify(message) + '\n');
+    }
+  };
+  submoduleManager.on('notification', forwardNotification);
+
   // Handle client disconnect
   req.on('close', () => {
     clearInterval(heartbeatInterval);
+    submoduleManager.off('notification', forwardNotification);
     console.log(`HTTP streaming connection closed for session: ${activeSessionId}`);
   });
 
   req.on('error', (error) => {
     clearInterval(heartbeatInterval);
+    submoduleManager.off('notification', forwardNotification);
     console.error(`HTTP streaming error for session ${activeSessionId}:`, error.message);
   });
 };
@@ -382,7 +413,8 @@ app.get('/', validateOrigin, validateProtocolVersion, handleMCPGet);
 // Common handler for MCP POST requests
 const handleMCPPost = async (req, res) => {
   try {
-    console.log('Received MCP request:', JSON.stringify(req.body, null, 2));
+    // Full bodies are kept in recentRequests (see /debug/requests); don't re-serialize them here
+    console.log(`Received MCP request: ${req.body?.method} (id: ${req.body?.id})`);
 
     // Validate Accept header - be permissive for compatibility
     // Allow missing Accept header for maximum compatibility
@@ -423,7 +455,8 @@ const handleMCPPost = async (req, res) => {
           sessionId = uuidv4();
           sessions.set(sessionId, {
             created: new Date(),
-            protocolVersion: params?.protocolVersion || MCP_PROTOCOL_VERSION
+            protocolVersion: params?.protocolVersion || MCP_PROTOCOL_VERSION,
+            servers: new Set()
           });
           console.log(`Created new session: ${sessionId}`);
           break;
@@ -442,6 +475,10 @@ const handleMCPPost = async (req, res) => {
           break;
 
         case 'tools/call':
+          // Submodule tools are named <server>__<tool>
+          if (typeof params?.name === 'string' && params.name.includes('__')) {
+            subscribeSession(req.get('Mcp-Session-Id'), params.name.split('__')[0]);
+          }
           result = await mcpServer.handleCallTool(params || {});
           break;
 
@@ -530,13 +567,7 @@ const handleMCPDelete = async (req, res) => {
   try {
     const sessionId = req.headers['mcp-session-id'];
     if (!sessionId) {
-      return res.status(400).json({
-        jsonrpc: '2.0',
-        error: {
-          code: -32603,
-          message: 'Mcp-Session-Id header required'
-        }
-      });
+      return sendErrorBody(res, 400, ERROR_BODIES.sessionIdRequired);
     }
 
     if (sessions.has(sessionId)) {
@@ -544,13 +575,7 @@ const handleMCPDelete = async (req, res) => {
       console.log(`Terminated session: ${sessionId}`);
       res.status(200).json({ success: true });
     } else {
-      res.status(404).json({
-        jsonrpc: '2.0',
-        error: {
-          code: -32603,
-          message: 'Session not found'
-        }
-      });
+      sendErrorBody(res, 404, ERROR_BODIES.sessionNotFound);
     }
 
   } catch (error) {
@@ -616,7 +641,12 @@ app.post('/mcp/:serverName/reload', async (req, res) => {
 app.post('/mcp/:serverName', validateOrigin, async (req, res) => {
   try {
     const { serverName } = req.params;
+    subscribeSession(req.get('Mcp-Session-Id'), serverName);
     const response = await submoduleManager.handleRequest(serverName, req.body);
+    // Handle notifications (no id)
+    if (response === null) {
+      return res.status(202).end();
+    }
     res.json(response);
   } catch (error) {
     console.error(`Error handling request for ${req.params.serverName}:`, error);
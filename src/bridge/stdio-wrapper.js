@@ -11,6 +11,7 @@ class StdioToHttpWrapper extends EventEmitter {
     this.processes = new Map(); // Pool of stdio processes
     this.activeRequests = new Map(); // Track pending requests
     this.messageBuffer = new Map(); // Buffer for incomplete messages
+    this.nextRequestId = 1; // Wire IDs for forwarded requests
     this.isInitialized = false;
   }
 
@@ -92,7 +93,7 @@ class StdioToHttpWrapper extends EventEmitter {
       
       try {
         // Send notification without waiting for response (notifications don't get responses)
-        processInfo.process.stdin.write(JSON.stringify(initializedNotification) + '\n');
+        this.writeMessage(processInfo, initializedNotification);
         console.log(`Sent 'initialized' notification to ${this.serverName}`);
         
         // Give the server a moment to process the initialized notification
@@ -118,10 +119,11 @@ class StdioToHttpWrapper extends EventEmitter {
 
     // Prepare spawn options - merge process.env with config.env
     // Ensure OPENROUTER_API_KEY is passed through if it exists
-    const mergedEnv = { 
-      ...process.env, 
-      ...this.config.env 
-    };
+    // Without server-specific variables, hand process.env over as-is instead of copying it
+    const hasServerEnv = this.config.env && Object.keys(this.config.env).length > 0;
+    const mergedEnv = hasServerEnv
+      ? { ...process.env, ...this.config.env }
+      : process.env;
     
     // Debug: log environment variables for Zen server
     if (this.serverName === 'zen-mcp-server') {
@@ -174,15 +176,22 @@ class StdioToHttpWrapper extends EventEmitter {
     });
 
     // Handle stdout (responses from stdio server)
-    let buffer = '';
+    // Only each new chunk is scanned for newlines; incomplete lines are kept as
+    // raw chunks and decoded once complete, so large responses aren't re-split
+    // on every read and multi-byte characters can't be cut in half
+    let pending = [];
     childProcess.stdout.on('data', (data) => {
-      buffer += data.toString();
-      
-      // Try to parse complete JSON-RPC messages
-      const lines = buffer.split('\n');
-      buffer = lines.pop() || ''; // Keep incomplete line in buffer
+      let start = 0;
+      let newline = data.indexOf(0x0a);
       
-      for (const line of lines) {
+      while (newline !== -1) {
+        const tail = data.subarray(start, newline);
+        const line = pending.length ? Buffer.concat([...pending, tail]).toString() : tail.toString();
+        pending = [];
+        start = newline + 1;
+        newline = data.indexOf(0x0a, start);
+        
+        // Try to parse complete JSON-RPC messages
         if (line.trim()) {
           try {
             const message = JSON.parse(line);
@@ -192,6 +201,16 @@ class StdioToHttpWrapper extends EventEmitter {
           }
         }
       }
+      
+      if (start < data.length) {
+        pending.push(data.subarray(start)); // Keep incomplete line for the next chunk
+      }
+    });
+
+    // Writes can race a child that dies on startup; the exit handler rejects
+    // the pending requests, so an EPIPE here only needs logging
+    childProcess.stdin.on('error', (error) => {
+      console.error(`Process ${processId} stdin error:`, error.message);
     });
 
     // Handle stderr (errors/logs from stdio server)
@@ -229,52 +248,34 @@ class StdioToHttpWrapper extends EventEmitter {
 
     this.processes.set(processId, processInfo);
     
-    // Wait for process to be ready (with timeout)
-    await this.waitForProcessReady(processId);
-    
+    // No fixed startup delay: stdin is buffered until the child reads it, and
+    // the initialize request (with its timeout) serves as the readiness probe
     return processId;
   }
 
-  async waitForProcessReady(processId, timeout = 5000) {
-    return new Promise((resolve, reject) => {
-      const startTime = Date.now();
-      const checkInterval = setInterval(() => {
-        const processInfo = this.processes.get(processId);
-        
-        if (!processInfo) {
-          clearInterval(checkInterval);
-          reject(new Error(`Process ${processId} not found`));
-          return;
-        }
-
-        if (Date.now() - startTime > timeout) {
-          clearInterval(checkInterval);
-          resolve(); // Resolve anyway after timeout
-        }
-      }, 100);
-
-      // Assume ready after a short delay (can be improved with actual ready signal)
-      setTimeout(() => {
-        clearInterval(checkInterval);
-        resolve();
-      }, 500);
-    });
-  }
-
   async sendRequestToProcess(processId, request) {
     const processInfo = this.processes.get(processId);
     if (!processInfo) {
       throw new Error(`Process not found: ${processId}`);
     }
 
+    // Notifications get no response, so there is nothing to track
+    if (request.id === undefined || request.id === null) {
+      this.writeMessage(processInfo, request);
+      return null;
+    }
+
+    // Forward under our own integer ID so concurrent callers can never collide
+    const requestId = this.nextRequestId++;
+
     // Create a promise that will resolve when we get the response
     const responsePromise = new Promise((resolve, reject) => {
       const timeout = setTimeout(() => {
-        this.activeRequests.delete(request.id);
+        this.activeRequests.delete(requestId);
         reject(new Error(`Request timeout for ${request.method}`));
       }, this.config.timeout || 30000);
 
-      this.activeRequests.set(request.id, {
+      this.activeRequests.set(requestId, {
         resolve: (response) => {
           clearTimeout(timeout);
           resolve(response);
@@ -283,16 +284,16 @@ class StdioToHttpWrapper extends EventEmitter {
           clearTimeout(timeout);
           reject(error);
         },
-        processId
+        processId,
+        originalId: request.id
       });
     });
 
     // Send request to stdio process
     try {
-      const requestStr = JSON.stringify(request) + '\n';
-      processInfo.process.stdin.write(requestStr);
+      this.writeMessage(processInfo, { ...request, id: requestId });
     } catch (error) {
-      this.activeRequests.delete(request.id);
+      this.activeRequests.delete(requestId);
       throw error;
     }
 
@@ -300,6 +301,11 @@ class StdioToHttpWrapper extends EventEmitter {
   }
 
   async sendRequest(request) {
+    // Notifications are written through as-is and never get a response
+    if (request.id === undefined || request.id === null) {
+      return this.sendNotification(request);
+    }
+
     // For tools/list, we need to use an initialized process
     let processId;
     if (request.method === 'tools/list' || request.method === 'tools/call') {
@@ -350,7 +356,7 @@ class StdioToHttpWrapper extends EventEmitter {
                 };
                 
                 try {
-                  processInfo.process.stdin.write(JSON.stringify(initializedNotification) + '\n');
+                  this.writeMessage(processInfo, initializedNotification);
                   console.log(`Sent 'initialized' notification after re-init to ${this.serverName}`);
                   await new Promise(resolve => setTimeout(resolve, 100));
                 } catch (notifError) {
@@ -381,29 +387,32 @@ class StdioToHttpWrapper extends EventEmitter {
     processInfo.lastUsed = Date.now();
     processInfo.requestCount++;
 
+    // Forward under our own integer ID so concurrent callers can never collide
+    const requestId = this.nextRequestId++;
+
     // Create promise for response
     const responsePromise = new Promise((resolve, reject) => {
       const timeout = setTimeout(() => {
-        this.activeRequests.delete(request.id);
+        this.activeRequests.delete(requestId);
         processInfo.busy = false;
         reject(new Error(`Request timeout: ${request.id}`));
       }, this.config.timeout || 30000);
 
-      this.activeRequests.set(request.id, {
+      this.activeRequests.set(requestId, {
         resolve,
         reject,
         timeout,
         processId,
+        originalId: request.id,
         startTime: Date.now()
       });
     });
 
     // Send request to stdio process
     try {
-      const requestStr = JSON.stringify(request) + '\n';
-      processInfo.process.stdin.write(requestStr);
+      this.writeMessage(processInfo, { ...request, id: requestId });
     } catch (error) {
-      this.activeRequests.delete(request.id);
+      this.activeRequests.delete(requestId);
       processInfo.busy = false;
       throw error;
     }
@@ -411,6 +420,49 @@ class StdioToHttpWrapper extends EventEmitter {
     return responsePromise;
   }
 
+  sendNotification(notification) {
+    let processInfo;
+    let message = notification;
+
+    if (notification.method === 'notifications/cancelled') {
+      // The client cancels by its own ID, but the child only saw our wire ID
+      const requestId = notification.params?.requestId;
+      const matches = [];
+      for (const [wireId, request] of this.activeRequests) {
+        if (request.originalId === requestId) {
+          matches.push(wireId);
+        }
+      }
+      if (matches.length !== 1) {
+        // Already answered, or several callers used this ID; cancellation is advisory
+        console.warn(`[${this.serverName}] Dropping cancellation for request ID: ${requestId}`);
+        return null;
+      }
+      const [wireId] = matches;
+      processInfo = this.processes.get(this.activeRequests.get(wireId).processId);
+      message = { ...notification, params: { ...notification.params, requestId: wireId } };
+    } else {
+      for (const info of this.processes.values()) {
+        if (info.mcpInitialized && info.process && !info.process.killed) {
+          processInfo = info;
+          break;
+        }
+      }
+    }
+
+    if (!processInfo) {
+      console.warn(`[${this.serverName}] No process to deliver ${notification.method} to`);
+      return null;
+    }
+
+    this.writeMessage(processInfo, message);
+    return null;
+  }
+
+  writeMessage(processInfo, message) {
+    processInfo.process.stdin.write(JSON.stringify(message) + '\n');
+  }
+
   async getInitializedProcess() {
     // Find a process that has been MCP initialized
     for (const [processId, processInfo] of this.processes) {
@@ -469,21 +521,25 @@ class StdioToHttpWrapper extends EventEmitter {
       console.error(`[${this.serverName}] Error response:`, JSON.stringify(message, null, 2));
     }
 
+    // Only messages without a method are responses; a server-initiated request
+    // carries the child's own ID, which can coincide with one of our wire IDs
+    const isResponse = message.method === undefined && ('result' in message || 'error' in message);
+
     // Handle response to a request
-    if (message.id !== undefined && message.id !== null) {
+    if (isResponse && message.id !== undefined && message.id !== null) {
       const request = this.activeRequests.get(message.id);
       if (request) {
         clearTimeout(request.timeout);
         this.activeRequests.delete(message.id);
         processInfo.busy = false;
+        // Hand the caller back the ID it sent
+        message.id = request.originalId;
         request.resolve(message);
       } else {
         console.warn(`[${this.serverName}] Received response for unknown request ID: ${message.id}`);
       }
-    }
-    
-    // Handle notifications (no id)
-    if (message.id === undefined || message.id === null) {
+    } else {
+      // Notifications and server-initiated requests
       this.emit('notification', message);
     }
   }
@@ -503,6 +559,7 @@ class StdioToHttpWrapper extends EventEmitter {
 
     // Remove process from pool
     this.processes.delete(processId);
+    this.emit('processExit', processId);
 
     // Restart if configured
     if (this.config.restartOnCrash) {
@@ -526,6 +583,7 @@ class StdioToHttpWrapper extends EventEmitter {
 
     // Remove from pool
     this.processes.delete(processId);
+    this.emit('processExit', processId);
 
     // Restart if needed and configured
     if (this.config.restartOnCrash && code !== 0) {
@@ -542,17 +600,31 @@ class StdioToHttpWrapper extends EventEmitter {
     }
     this.activeRequests.clear();
 
-    // Kill all processes
+    // Kill all processes and wait for them to exit, so none are left behind
+    const exits = [];
     for (const [processId, info] of this.processes) {
-      if (info.process && !info.process.killed) {
-        info.process.kill('SIGTERM');
+      if (info.process && info.process.exitCode === null && info.process.signalCode === null) {
+        exits.push(this.terminateProcess(info.process));
       }
     }
     this.processes.clear();
+    await Promise.all(exits);
 
     this.isInitialized = false;
   }
 
+  terminateProcess(childProcess, timeout = this.config.shutdownTimeout || 5000) {
+    return new Promise((resolve) => {
+      // Escalate to SIGKILL if the server ignores SIGTERM
+      const killTimer = setTimeout(() => childProcess.kill('SIGKILL'), timeout);
+      childProcess.once('exit', () => {
+        clearTimeout(killTimer);
+        resolve();
+      });
+      childProcess.kill('SIGTERM');
+    });
+  }
+
   getStatus() {
     const processStatuses = [];
     for (const [processId, info] of this.processes) {
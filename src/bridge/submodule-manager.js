@@ -1,10 +1,18 @@
 const fs = require('fs');
 const path = require('path');
+const { EventEmitter } = require('events');
 const StdioToHttpWrapper = require('./stdio-wrapper');
 
-class SubmoduleManager {
+// How long a server's tools/list result is reused before asking it again
+const TOOLS_CACHE_TTL = 60000;
+
+class SubmoduleManager extends EventEmitter {
   constructor() {
+    super();
+    this.setMaxListeners(0); // One 'notification' listener per open streaming connection
     this.wrappers = new Map(); // serverName -> StdioToHttpWrapper
+    this.toolsCache = new Map(); // serverName -> { tools, expiresAt }
+    this.toolsInFlight = new Map(); // serverName -> pending tools/list promise
     this.config = null;
     this.mcpServersDir = path.join(__dirname, '../../mcp-servers');
     this.configPath = path.join(this.mcpServersDir, 'config.json');
@@ -24,25 +32,25 @@ class SubmoduleManager {
 
   async loadConfig() {
     try {
-      if (fs.existsSync(this.configPath)) {
-        const configContent = fs.readFileSync(this.configPath, 'utf8');
-        this.config = JSON.parse(configContent);
-        console.log('Loaded MCP servers configuration');
-      } else {
-        console.log('No config.json found, using defaults');
-        this.config = {
-          servers: {},
-          defaults: {
-            timeout: 30000,
-            maxInstances: 1,
-            restartOnCrash: true,
-            startupTimeout: 10000
-          }
-        };
-      }
+      // Read once and treat a missing file as "no config" instead of stat-ing first
+      const configContent = await fs.promises.readFile(this.configPath, 'utf8');
+      this.config = JSON.parse(configContent);
+      console.log('Loaded MCP servers configuration');
     } catch (error) {
-      console.error('Failed to load config:', error);
-      throw error;
+      if (error.code !== 'ENOENT') {
+        console.error('Failed to load config:', error);
+        throw error;
+      }
+      console.log('No config.json found, using defaults');
+      this.config = {
+        servers: {},
+        defaults: {
+          timeout: 30000,
+          maxInstances: 1,
+          restartOnCrash: true,
+          startupTimeout: 10000
+        }
+      };
     }
   }
 
@@ -58,6 +66,7 @@ class SubmoduleManager {
     const entries = fs.readdirSync(this.mcpServersDir, { withFileTypes: true });
     console.log(`Found ${entries.length} entries in MCP servers directory`);
     
+    const serverNames = [];
     for (const entry of entries) {
       console.log(`Checking entry: ${entry.name} (isDirectory: ${entry.isDirectory()})`);
       
@@ -84,12 +93,25 @@ class SubmoduleManager {
         
         if (hasPackageJson || hasIndexJs || hasPyProjectToml || hasServerPy || hasMainFile || isConfigured) {
           console.log(`✓ ${entry.name} is a valid MCP server, initializing...`);
-          await this.initializeServer(entry.name);
+          serverNames.push(entry.name);
         } else {
           console.log(`✗ Skipping ${entry.name}: not a valid MCP server directory`);
         }
       }
     }
+    
+    // Start all servers at once; initializeServer() handles its own failures
+    await Promise.all(serverNames.map(serverName => this.initializeServer(serverName)));
+    
+    // Keep wrappers (and so the combined tool list) in directory order,
+    // not in the order the servers happened to finish starting
+    const initialized = new Map(this.wrappers);
+    this.wrappers.clear();
+    for (const serverName of serverNames) {
+      if (initialized.has(serverName)) {
+        this.wrappers.set(serverName, initialized.get(serverName));
+      }
+    }
   }
 
   findMainFile(serverPath) {
@@ -150,6 +172,20 @@ class SubmoduleManager {
 
     try {
       const wrapper = new StdioToHttpWrapper(serverName, mergedConfig);
+      
+      // Drop cached tools whenever the server restarts or says they changed
+      wrapper.on('processExit', () => this.toolsCache.delete(serverName));
+      wrapper.on('notification', (message) => {
+        if (message.method === 'notifications/tools/list_changed') {
+          this.toolsCache.delete(serverName);
+        }
+        // Pass server-initiated messages on to connected streaming clients; the
+        // wrapper also reports id-less error responses here, which aren't notifications
+        if (typeof message.method === 'string') {
+          this.emit('notification', serverName, message);
+        }
+      });
+      
       await wrapper.initialize();
       this.wrappers.set(serverName, wrapper);
       console.log(`✅ Successfully initialized ${serverName}`);
@@ -278,6 +314,8 @@ class SubmoduleManager {
       await wrapper.shutdown();
       this.wrappers.delete(serverName);
     }
+    this.toolsCache.delete(serverName);
+    this.toolsInFlight.delete(serverName);
     
     await this.initializeServer(serverName);
   }
@@ -287,30 +325,7 @@ class SubmoduleManager {
     
     for (const [serverName, wrapper] of this.wrappers) {
       try {
-        // Make sure the server is initialized
-        if (!wrapper.isInitialized) {
-          await wrapper.initialize();
-        }
-        
-        // Get tools from this server
-        const response = await wrapper.sendRequest({
-          jsonrpc: '2.0',
-          method: 'tools/list',
-          params: {},
-          id: `list-tools-${Date.now()}`
-        });
-        
-        if (response && response.result && response.result.tools) {
-          // Add server name prefix to avoid conflicts
-          const serverTools = response.result.tools.map(tool => ({
-            ...tool,
-            name: `${serverName}__${tool.name}`,
-            description: `[${serverName}] ${tool.description || ''}`
-          }));
-          allTools.push(...serverTools);
-        } else if (response && response.error) {
-          console.error(`Error response from ${serverName}:`, response.error);
-        }
+        allTools.push(...await this.getServerTools(serverName, wrapper));
       } catch (error) {
         console.error(`Failed to get tools from ${serverName}:`, error.message);
         // For debugging, let's see what the actual error response is
@@ -321,6 +336,64 @@ class SubmoduleManager {
     return allTools;
   }
 
+  async getServerTools(serverName, wrapper) {
+    // Tool lists rarely change for a running server, so reuse a recent answer
+    const cached = this.toolsCache.get(serverName);
+    if (cached && cached.expiresAt > Date.now()) {
+      return cached.tools;
+    }
+    
+    // Concurrent callers share one tools/list request instead of each sending their own
+    const inFlight = this.toolsInFlight.get(serverName);
+    if (inFlight) {
+      return inFlight;
+    }
+    
+    const request = this.fetchServerTools(serverName, wrapper)
+      .finally(() => {
+        // A reload may already have replaced this entry with a newer fetch
+        if (this.toolsInFlight.get(serverName) === request) {
+          this.toolsInFlight.delete(serverName);
+        }
+      });
+    this.toolsInFlight.set(serverName, request);
+    return request;
+  }
+
+  async fetchServerTools(serverName, wrapper) {
+    // Make sure the server is initialized
+    if (!wrapper.isInitialized) {
+      await wrapper.initialize();
+    }
+    
+    // Get tools from this server
+    const response = await wrapper.sendRequest({
+      jsonrpc: '2.0',
+      method: 'tools/list',
+      params: {},
+      id: `list-tools-${Date.now()}`
+    });
+    
+    if (response && response.result && response.result.tools) {
+      // Add server name prefix to avoid conflicts
+      const serverTools = response.result.tools.map(tool => ({
+        ...tool,
+        name: `${serverName}__${tool.name}`,
+        description: `[${serverName}] ${tool.description || ''}`
+      }));
+      // Don't cache an answer from a wrapper that was reloaded while we waited
+      if (this.wrappers.get(serverName) === wrapper) {
+        this.toolsCache.set(serverName, { tools: serverTools, expiresAt: Date.now() + TOOLS_CACHE_TTL });
+      }
+      return serverTools;
+    }
+    
+    if (response && response.error) {
+      console.error(`Error response from ${serverName}:`, response.error);
+    }
+    return [];
+  }
+
   async callTool(toolName, args) {
     // Check if the tool name has a server prefix
     const parts = toolName.split('__');
@@ -381,15 +454,17 @@ class SubmoduleManager {
 
   async shutdown() {
     console.log('Shutting down all MCP servers...');
-    for (const [name, wrapper] of this.wrappers) {
+    await Promise.all(Array.from(this.wrappers, async ([name, wrapper]) => {
       try {
         await wrapper.shutdown();
         console.log(`Shut down ${name}`);
       } catch (error) {
         console.error(`Error shutting down ${name}:`, error);
       }
-    }
+    }));
     this.wrappers.clear();
+    this.toolsCache.clear();
+    this.toolsInFlight.clear();
   }
 }
 